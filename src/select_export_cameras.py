@@ -1,22 +1,21 @@
-import time
+import csv
+from operator import attrgetter
 from pathlib import Path
-from typing import Optional, Dict, List, Callable
-
-from abyss.robotics.metashape.utilities import get_camera
+from typing import Optional, Dict, List, Set
 
 from PySide2.QtWidgets import (
     QApplication,
     QMainWindow,
     QDockWidget,
-    QListWidget,
+    QListView,
     QHBoxLayout,
     QVBoxLayout,
     QWidget,
     QPushButton,
-    QListWidgetItem,
     QAbstractItemView,
     QFileDialog,
 )
+from PySide2.QtGui import QStandardItem, QStandardItemModel
 from PySide2 import QtCore
 
 import Metashape
@@ -33,40 +32,6 @@ def find_main_window() -> Optional[QMainWindow]:
     return None
 
 
-class CameraMonitor(QtCore.QObject):
-    """monitors the cameras in Metashape.app.document.chunk"""
-
-    camera_signal = QtCore.Signal()
-
-    def __init__(self, app: Metashape.Application) -> None:
-        """initialises with application"""
-        super().__init__()
-        self.app = app
-
-        self.camera_labels: List[str] = None
-        """previous list of camera labels"""
-
-        self.stop = False
-        """used to stop the thread"""
-
-    @QtCore.Slot()
-    def monitor_cameras(self) -> None:
-        """monitors cameras"""
-        while not self.stop:
-            time.sleep(1.0)
-            if not self.app.document:
-                continue
-            if not self.app.document.chunk:
-                continue
-            camera_labels = [camera.label for camera in self.app.document.chunk.cameras]
-            if not self.camera_labels:
-                self.camera_labels = camera_labels
-                continue
-            if not camera_labels == self.camera_labels:
-                self.camera_labels = camera_labels
-                self.camera_signal.emit()
-
-
 class CameraSelector(QWidget):
     """widget for selecting cameras to export
 
@@ -92,11 +57,27 @@ class CameraSelector(QWidget):
         self.app = app
         """metashape application"""
 
-        self.list = QListWidget()
+        self.list = QListView()
         """list containing cameras"""
 
-        self.items: Dict[str, QListWidgetItem] = {}
-        """dict of camera items, key is camera name"""
+        self.model = QStandardItemModel(self)
+        """model holding a checkable item per camera"""
+
+        self.items: Dict[str, QStandardItem] = {}
+        """dict of camera items, key is camera name
+
+        if cameras share a name, every camera has a row but only the first
+        row is kept here
+        """
+
+        self.selected_labels: Optional[Set[str]] = None
+        """labels of the items selected at the last selection change"""
+
+        self.update_items_timer = QtCore.QTimer(self)
+        """single shot timer coalescing selection changes into one update"""
+        self.update_items_timer.setSingleShot(True)
+        self.update_items_timer.setInterval(0)
+        self.update_items_timer.timeout.connect(self.update_items)
 
         self.initialise_widget()
 
@@ -106,15 +87,6 @@ class CameraSelector(QWidget):
         """initialises the widget layout"""
         layout = QVBoxLayout()
         button_layout = QHBoxLayout()
-
-        def _create_button(
-            layout: QHBoxLayout, label: str, callback: Callable[[], None]
-        ) -> None:
-            """creates button"""
-            button = QPushButton(label)
-            button.clicked.connect(callback)
-            layout.addWidget(button)
-
         buttons = [
             ("Add Selected", self.check_selected),
             ("Select Checked", self.select_checked),
@@ -122,50 +94,88 @@ class CameraSelector(QWidget):
             ("Update Cameras", self.update_cameras),
             ("Export", self.export_cameras),
         ]
-        for button in buttons:
-            _create_button(layout=button_layout, label=button[0], callback=button[1])
+        for label, callback in buttons:
+            button = QPushButton(label)
+            button.clicked.connect(callback)
+            button_layout.addWidget(button)
         layout.addLayout(button_layout)
         layout.addWidget(self.list)
-        self.list.itemSelectionChanged.connect(self.update_items)
+        self.list.setModel(self.model)
+        self.list.selectionModel().selectionChanged.connect(self.queue_update_items)
         self.list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list.setUniformItemSizes(True)
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
 
-    # def start_cameras_monitor(self) -> None:
-    #     """starts the camera monitor to check for changes in cameras"""
-    #     self.camera_monitor = CameraMonitor(app=self.app)
-    #     self.camera_monitor_thread = QtCore.QThread(self)
-    #     self.camera_monitor.camera_signal.connect(self.update_cameras)
-    #     self.camera_monitor.moveToThread(self.camera_monitor_thread)
-    #     self.camera_monitor_thread.started.connect(self.camera_monitor.monitor_cameras)
-    #     self.camera_monitor_thread.start()
-
-    # def stop_cameras_monitor(self):
-    #     """stops the camera monitor thread"""
-    #     self.camera_monitor.stop = True
-    #     self.camera_monitor_thread.quit()
-    #     self.camera_monitor_thread.wait()
-
-    # def closeEvent(self, event) -> None:
-    #     """close event"""
-    #     self.stop_cameras_monitor()
-
     @QtCore.Slot()
     def update_cameras(self) -> None:
         """updates the cameras list"""
-        self.list.clear()
-        self.items.clear()
-        for camera in self.app.document.chunk.cameras:
-            item = QListWidgetItem(camera.label, self.list)
-            item.setCheckState(QtCore.Qt.Unchecked)
-            self.items[camera.label] = item
+        cameras = list(self.app.document.chunk.cameras)
+        items = self.items
+        model = self.model
+        unchecked = QtCore.Qt.Unchecked
+        checked = QtCore.Qt.Checked
+        labels = [camera.label for camera in cameras]
+        rows = [model.item(row).text() for row in range(model.rowCount())]
+        if rows == labels:
+            # same cameras, existing items and their check states are kept
+            return
+        label_set = set(labels)
+        removed = set(items) - label_set
+        if len(label_set) != len(labels) or len(items) != len(rows):
+            # labels are not unique (e.g. same image names from different
+            # folders), rows can't be matched to cameras by label
+            rebuild = True
+        else:
+            kept = [label for label in rows if label in label_set]
+            rebuild = kept != [label for label in labels if label in items]
+        checked_labels = set()
+        if rebuild:
+            # rows can only be inserted in place if the kept rows are in chunk
+            # order and unique, otherwise rebuild all rows keeping their check
+            # states
+            checked_labels = {
+                label for label, item in items.items() if item.checkState() == checked
+            }
+        if rebuild or removed:
+            # removing rows drops their selection without a selectionChanged
+            # signal, so the cached selection can no longer be trusted
+            self.selected_labels = None
+        self.list.setUpdatesEnabled(False)
+        try:
+            if rebuild:
+                model.removeRows(0, model.rowCount())
+                items.clear()
+            else:
+                for label in removed:
+                    model.removeRow(items.pop(label).row())
+            append = not items
+            new_items = []
+            for row, label in enumerate(labels):
+                if label in items and not append:
+                    continue
+                item = QStandardItem(label)
+                item.setEditable(False)
+                item.setCheckable(True)
+                item.setCheckState(checked if label in checked_labels else unchecked)
+                items.setdefault(label, item)
+                if append:
+                    new_items.append(item)
+                else:
+                    model.insertRow(row, item)
+            if new_items:
+                model.invisibleRootItem().appendRows(new_items)
+        finally:
+            self.list.setUpdatesEnabled(True)
 
     def check_selected(self) -> None:
         """checks selected cameras"""
-        for camera in self.app.document.chunk.cameras:
+        cameras = list(self.app.document.chunk.cameras)
+        items = self.items
+        checked = QtCore.Qt.Checked
+        for camera in cameras:
             if camera.selected:
-                item = self.items[camera.label]
-                item.setCheckState(QtCore.Qt.Checked)
+                items[camera.label].setCheckState(checked)
 
     def clear_selected(self) -> None:
         """clears selected cameras"""
@@ -173,43 +183,73 @@ class CameraSelector(QWidget):
             item.setCheckState(QtCore.Qt.Unchecked)
 
     def select_checked(self) -> None:
-        """clears selected cameras"""
-        for camera in self.app.document.chunk.cameras:
-            item = self.items[camera.label]
-            if item.checkState() == QtCore.Qt.Unchecked:
-                camera.selected = False
-                item.setSelected(False)
-            else:
-                camera.selected = True
-                item.setSelected(True)
+        """selects checked cameras"""
+        model = self.model
+        unchecked = QtCore.Qt.Unchecked
+        checked_rows = [
+            row
+            for row in range(model.rowCount())
+            if model.item(row).checkState() != unchecked
+        ]
+        # merge consecutive rows so the selection holds one range per run
+        selection = QtCore.QItemSelection()
+        start = end = None
+        for row in checked_rows + [None]:
+            if end is not None and row == end + 1:
+                end = row
+                continue
+            if start is not None:
+                selection.select(model.index(start, 0), model.index(end, 0))
+            start = end = row
+        # applied as a single selection change, update_items then writes it
+        # to the cameras, forced in case the list selection did not change
+        self.selected_labels = None
+        self.list.selectionModel().select(
+            selection, QtCore.QItemSelectionModel.ClearAndSelect
+        )
+        self.update_items()
 
+    def get_selected_labels(self) -> List[str]:
+        """returns the labels of the selected items in the list"""
+        return [index.data() for index in self.list.selectionModel().selectedIndexes()]
+
+    def queue_update_items(self) -> None:
+        """signal for when the item selection is changed
+
+        defers update_items to the next event loop iteration, so a burst of
+        selection changes (e.g. dragging across items) results in one update
+        """
+        self.update_items_timer.start()
+
+    @QtCore.Slot()
     def update_items(self) -> None:
-        """signal for when the item selection is changed"""
-        selected_items = [item.text() for item in self.list.selectedItems()]
-        for camera in self.app.document.chunk.cameras:
-            if camera.label in selected_items:
-                camera.selected = True
-            else:
-                camera.selected = False
+        """writes the item selection to the cameras"""
+        selected_labels = set(self.get_selected_labels())
+        if selected_labels == self.selected_labels:
+            return
+        self.selected_labels = selected_labels
+        cameras = list(self.app.document.chunk.cameras)
+        for camera in cameras:
+            camera.selected = camera.label in selected_labels
 
     def export_cameras(self) -> None:
         """exports the checked cameras"""
-        camera_labels = [item.text() for item in self.list.selectedItems()]
-        cameras = [
-            get_camera(chunk=self.app.document.chunk, label=camera_label)
-            for camera_label in camera_labels
-        ]
+        camera_labels = self.get_selected_labels()
+        cameras_by_label: Dict[str, Metashape.Camera] = {}
+        for camera in self.app.document.chunk.cameras:
+            cameras_by_label.setdefault(camera.label, camera)
+        cameras = [cameras_by_label.get(camera_label) for camera_label in camera_labels]
         path = str(Path(Metashape.app.document.path).parent / "cameras.csv")
         export_path, _ = QFileDialog.getSaveFileName(
             self, "Export Cameras", path, "CSV files (*.csv)"
         )
         if not export_path:
             return
-        with open(export_path, "w") as export_file:
-            for camera in cameras:
-                if not camera:
-                    continue
-                export_file.write(f"{camera.label},{camera.photo.path}\n")
+        get_row = attrgetter("label", "photo.path")
+        rows = [get_row(camera) for camera in cameras if camera]
+        with open(export_path, "w", buffering=1 << 20, newline="") as export_file:
+            writer = csv.writer(export_file, lineterminator="\n")
+            writer.writerows(rows)
 
 
 class CameraSelectorDock(QDockWidget):
@@ -226,10 +266,6 @@ class CameraSelectorDock(QDockWidget):
         self.setWidget(CameraSelector(app=app))
         self.setFloating(False)
 
-    # def closeEvent(self, event) -> None:
-    #     """close event"""
-    #     self.widget().closeEvent(event)
-
 
 def add_to_dock():
     """adds the widget to dock"""